@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""Benchmark de throughput: backend paho vs backend raw.
+
+Publica `--count` mensajes sin límite de frecuencia contra el broker de
+`.env.app` (MQTT_BROKER/MQTT_PORT/MQTT_TOPIC/MQTT_QOS) y mide msg/s hasta
+que el último mensaje queda confirmado (close() espera los PUBACK en QoS 1).
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from core.mqtt_client import MqttPublisher
+from core.raw_mqtt_client import RawMqttPublisher
+
+
+BACKENDS = {"paho": MqttPublisher, "raw": RawMqttPublisher}
+
+
+def bench(backend: str, broker: str, port: int, topic: str, qos: int, count: int, payload: bytes, batch: int) -> float:
+    publisher = BACKENDS[backend](broker=broker, port=port, topic=topic, qos=qos)
+    start = time.perf_counter()
+    for i in range(1, count + 1):
+        publisher.publish(payload)
+        # Simula el tick del motor cuando va retrasado: flush cada `batch`
+        if i % batch == 0:
+            publisher.flush()
+    publisher.flush()
+    publisher.close()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--payload-size", type=int, default=256)
+    parser.add_argument("--batch", type=int, default=64, help="mensajes por flush (tick)")
+    parser.add_argument("--backends", default="paho,raw")
+    args = parser.parse_args()
+
+    project_root_env_app = Path(__file__).resolve().parents[1] / ".env.app"
+    if project_root_env_app.exists():
+        load_dotenv(project_root_env_app)
+    broker = os.environ["MQTT_BROKER"]
+    port = int(os.environ["MQTT_PORT"])
+    topic = os.environ["MQTT_TOPIC"]
+    qos = int(os.environ["MQTT_QOS"])
+
+    payload = b"x" * args.payload_size
+    for backend in args.backends.split(","):
+        rate = bench(backend, broker, port, topic, qos, args.count, payload, args.batch)
+        print(f"{backend:>5}: {rate:,.0f} msg/s  ({args.count} msgs, {args.payload_size} B, QoS {qos})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+# Formato del índice binario (little-endian):
+#   cabecera: magic(4s) version(u32) kind(u32) count(u64) fingerprint(16s)
+#   offsets:  (count + 1) × u64, relativos al inicio de la zona de datos
+#   datos:    elementos concatenados (JSON utf-8 compacto o bytes crudos)
+# `fingerprint` resume tamaño y mtime_ns del origen (y de cada archivo si es un
+# directorio); cualquier diferencia, aunque el origen sea más antiguo, invalida
+# el índice.
+_MAGIC = b"MQAI"
+_VERSION = 2
+_HEADER = struct.Struct("<4sIIQ16s")
+_OFFSET = struct.Struct("<Q")
+
+KIND_JSON = 0
+KIND_RAW = 1
+
+INDEX_SUFFIX = ".idx"
+
+# Directorio de índices opcional; si no se define se usa `assets/` del
+# escenario y, si no es escribible, la caché del usuario
+CACHE_DIR_ENV = "ASSET_CACHE_DIR"
+
+
+def _extract_list(data: Any, key: Optional[str]) -> list:
+    # Misma regla que el antiguo _load_list: lista directa u objeto con clave
+    if key is not None:
+        data = data.get(key) if isinstance(data, dict) else None
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and isinstance(data.get("list"), list):
+        return data["list"]
+    return []
+
+
+def source_fingerprint(source: Path, key: Optional[str] = None) -> bytes:
+    """Huella (16 bytes) de tamaño y mtime_ns del origen y la clave extraída."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(key).encode("utf-8"))
+    if source.is_dir():
+        for p in sorted(source.iterdir()):
+            if p.is_file():
+                st = p.stat()
+                h.update(repr((p.name, st.st_size, st.st_mtime_ns)).encode("utf-8", "backslashreplace"))
+    elif source.exists():
+        st = source.stat()
+        h.update(repr((st.st_size, st.st_mtime_ns)).encode("utf-8"))
+    else:
+        h.update(b"missing")
+    return h.digest()
+
+
+def _write_index(
+    index_path: Path, kind: int, elements: Iterator[bytes], count: int, fingerprint: bytes
+) -> None:
+    """Escribe el índice de forma atómica (tmp + replace)."""
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + f".{os.getpid()}.tmp")
+    offsets = array("Q", [0])
+    try:
+        with tmp_path.open("wb") as fh:
+            # Reservar cabecera + tabla de offsets; se rellenan al final
+            fh.write(_HEADER.pack(_MAGIC, _VERSION, kind, count, fingerprint))
+            fh.write(b"\0" * (_OFFSET.size * (count + 1)))
+            pos = 0
+            for blob in elements:
+                fh.write(blob)
+                pos += len(blob)
+                offsets.append(pos)
+            fh.seek(_HEADER.size)
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            fh.write(offsets.tobytes())
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def build_json_index(
+    json_path: Path, index_path: Path, key: Optional[str] = None, fingerprint: Optional[bytes] = None
+) -> None:
+    """Convierte un asset JSON (lista u objeto con `list`/`key`) a índice binario."""
+    if fingerprint is None:
+        fingerprint = source_fingerprint(json_path, key)
+    items: list = []
+    if json_path.exists():
+        items = _extract_list(json.loads(json_path.read_text(encoding="utf-8")), key)
+    # Un único encoder: json.dumps con argumentos crea uno nuevo por llamada
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    encoded = (encode(item).encode("utf-8") for item in items)
+    _write_index(index_path, KIND_JSON, encoded, len(items), fingerprint)
+
+
+def _blob_files(source_dir: Path) -> List[Path]:
+    # Orden de los elementos en un índice de directorio: por nombre de archivo
+    return sorted(p for p in source_dir.iterdir() if p.is_file()) if source_dir.is_dir() else []
+
+
+def build_blob_index(source_dir: Path, index_path: Path, fingerprint: Optional[bytes] = None) -> None:
+    """Empaqueta los archivos de un directorio (orden por nombre) como bytes crudos."""
+    if fingerprint is None:
+        fingerprint = source_fingerprint(source_dir)
+    files = _blob_files(source_dir)
+    _write_index(index_path, KIND_RAW, (p.read_bytes() for p in files), len(files), fingerprint)
+
+
+def _user_cache_dir() -> Path:
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base or tempfile.gettempdir()) / "mqtt-message-emitter" / "assets"
+
+
+class AssetList(Sequence):
+    """Secuencia de solo lectura sobre un índice mapeado en memoria.
+
+    Los elementos se leen bajo demanda por índice, por lo que `random.choice`
+    y el recorrido secuencial (`lst[i % len(lst)]`) no cargan el archivo entero.
+    Para índices JSON se devuelve el valor decodificado; para índices crudos un
+    `memoryview` sobre el mapa (sin copias). Esas vistas mantienen el mapa
+    abierto: `close()` no falla si siguen vivas, el mapa se libera al soltarlas.
+    """
+
+    def __init__(self, index_path: Path, fingerprint: Optional[bytes] = None) -> None:
+        self.path = Path(index_path)
+        self._view = None
+        self._fh = self.path.open("rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            self._fh.close()
+            raise ValueError(f"Índice de assets inválido: {self.path}")
+        if len(self._mm) < _HEADER.size:
+            self.close()
+            raise ValueError(f"Índice de assets inválido: {self.path}")
+        magic, version, kind, count, stored = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"Índice de assets inválido: {self.path}")
+        if fingerprint is not None and stored != fingerprint:
+            self.close()
+            raise ValueError(f"Índice de assets desactualizado: {self.path}")
+        self.fingerprint = stored
+        self.kind = kind
+        self._count = count
+        self._data_start = _HEADER.size + _OFFSET.size * (count + 1)
+        self._view = memoryview(self._mm)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def raw(self, index: int) -> memoryview:
+        """Bytes del elemento `index` como vista sobre el mapa (zero-copy)."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("AssetList index out of range")
+        start, end = struct.unpack_from("<2Q", self._mm, _HEADER.size + _OFFSET.size * index)
+        return self._view[self._data_start + start:self._data_start + end]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        blob = self.raw(index)
+        if self.kind == KIND_RAW:
+            return blob
+        return json.loads(bytes(blob))
+
+    def close(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        try:
+            self._mm.close()
+        except BufferError:
+            # Quedan vistas vivas (p.ej. adjuntos en vuelo); el mapa se
+            # cierra solo cuando se liberen
+            pass
+        self._fh.close()
+
+
+class AssetStore:
+    """Colección perezosa de assets de un escenario.
+
+    `spec` mapea nombre -> origen relativo a `assets_dir`:
+      - `"names.json"`: lista JSON (o objeto con clave `list`)
+      - `("detected_object.json", "seeds")`: lista bajo una clave concreta
+      - `"crops"` (directorio): un elemento binario por archivo; `names("crops")`
+        da el índice de cada archivo por su nombre
+
+    Cada origen se convierte una sola vez a `<origen>.<huella>.idx` y se mapea
+    en memoria en el primer acceso, de modo que solo el escenario seleccionado
+    llega a tocar sus assets. La huella (tamaño + mtime_ns) va en el nombre y
+    en la cabecera: un origen modificado genera un índice nuevo en vez de
+    reemplazar uno que otra ejecución pueda tener mapeado (Windows).
+
+    Los índices se escriben en `cache_dir` (o `$ASSET_CACHE_DIR`); por defecto
+    junto a los assets y, si no es escribible, en la caché del usuario. Si no
+    se puede construir el índice se registra el error y el asset queda vacío.
+    """
+
+    def __init__(self, assets_dir: Path, spec: Dict[str, Any], cache_dir: Optional[Path] = None) -> None:
+        self.assets_dir = Path(assets_dir)
+        self.spec = dict(spec)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._opened: Dict[str, Sequence] = {}
+        self._names: Dict[str, Dict[str, int]] = {}
+
+    def _source(self, name: str):
+        entry = self.spec[name]
+        if isinstance(entry, (tuple, list)):
+            return self.assets_dir / entry[0], entry[1]
+        return self.assets_dir / entry, None
+
+    def _index_dirs(self) -> List[Path]:
+        configured = self.cache_dir or os.environ.get(CACHE_DIR_ENV)
+        if configured:
+            return [Path(configured)]
+        # En la caché del usuario, un subdirectorio por carpeta de assets
+        # para que `names.json` de distintos escenarios no colisionen
+        tag = hashlib.blake2b(str(self.assets_dir.resolve()).encode("utf-8"), digest_size=8).hexdigest()
+        return [self.assets_dir, _user_cache_dir() / tag]
+
+    @staticmethod
+    def _prune(directory: Path, prefix: str, keep: str) -> None:
+        # Borrar índices de versiones anteriores del mismo origen; si alguno
+        # sigue mapeado (Windows) se deja para la próxima vez
+        pattern = re.compile(re.escape(prefix) + r"\.[0-9a-f]{16}" + re.escape(INDEX_SUFFIX) + "$")
+        for p in directory.iterdir():
+            if p.name != keep and pattern.match(p.name):
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+
+    def _open_index(self, directory: Path, source: Path, key: Optional[str]) -> AssetList:
+        fingerprint = source_fingerprint(source, key)
+        prefix = f"{source.name}.{key}" if key else source.name
+        index_path = directory / f"{prefix}.{fingerprint[:8].hex()}{INDEX_SUFFIX}"
+        if index_path.exists():
+            try:
+                return AssetList(index_path, fingerprint)
+            except ValueError as e:
+                logger.warning("%s; se regenera", e)
+        if source.is_dir():
+            build_blob_index(source, index_path, fingerprint)
+        else:
+            build_json_index(source, index_path, key, fingerprint)
+        self._prune(directory, prefix, index_path.name)
+        return AssetList(index_path, fingerprint)
+
+    def __getitem__(self, name: str) -> Sequence:
+        lst = self._opened.get(name)
+        if lst is None:
+            source, key = self._source(name)
+            lst = ()
+            for directory in self._index_dirs():
+                try:
+                    lst = self._open_index(directory, source, key)
+                    break
+                except OSError as e:
+                    # Solo lectura, en uso por otra ejecución, ...: probar el siguiente
+                    logger.warning("No se pudo preparar el índice de '%s' en %s: %s", name, directory, e)
+                except Exception as e:
+                    logger.error("Asset '%s' inválido (%s): %s; se usa lista vacía", name, source, e)
+                    break
+            else:
+                logger.error("Sin directorio escribible para el índice de '%s'; se usa lista vacía", name)
+            # Mismo listado que fijó la huella del índice abierto
+            self._names[name] = (
+                {p.name: i for i, p in enumerate(_blob_files(source))} if lst and source.is_dir() else {}
+            )
+            self._opened[name] = lst
+        return lst
+
+    def names(self, name: str) -> Dict[str, int]:
+        """Nombre de archivo -> índice para un asset de directorio (vacío si no lo es)."""
+        self[name]  # abre (y construye) el índice si hace falta
+        return self._names[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.spec
+
+    def keys(self):
+        return self.spec.keys()
+
+    def close(self) -> None:
+        for lst in self._opened.values():
+            if isinstance(lst, AssetList):
+                lst.close()
+        self._opened.clear()
+        self._names.clear()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+import difflib
+import json
+import queue
+import sys
+import threading
+import time
+from typing import List, Optional, TextIO
+
+from core.payload import Payload, attachment_summary, describe, split_message
+
+
+PRINT_MODES = ("none", "first", "nth", "all", "every", "persec", "diff")
+
+_STOP = object()
+
+
+class ConsoleSink:
+    """Salida por consola fuera del hilo de envío.
+
+    `offer` decide el muestreo (barato) y encola sin bloquear; un hilo de fondo
+    renderiza y escribe en bloque. Si la consola no da abasto la cola se llena
+    y los mensajes se descartan y cuentan en `dropped` en vez de frenar el
+    ritmo de publicación. Si escribir falla (tubería cerrada, codificación de
+    la consola...) la salida se desactiva y el hilo sigue drenando la cola.
+
+    Modos (`n` = PRINT_N):
+      - first / nth / all: como antes
+      - every: uno de cada `n` mensajes
+      - persec: hasta `n` mensajes por segundo
+      - diff: cada `n` mensajes, diff del JSON indentado frente al anterior mostrado
+    """
+
+    def __init__(
+        self,
+        mode: str = "none",
+        n: int = 1,
+        maxsize: int = 1024,
+        stream: Optional[TextIO] = None,
+    ) -> None:
+        if mode not in PRINT_MODES:
+            raise ValueError(f"Unknown print mode: {mode}")
+        self.mode = mode
+        self.n = max(1, int(n))
+        self.stream = stream or sys.stdout
+        # Un contador por hilo: `+=` no es atómico entre hilos
+        self._dropped_full = 0  # hilo de envío: cola llena
+        self._dropped_sink = 0  # hilo de la consola: render/escritura fallida
+        self._broken: Optional[BaseException] = None
+        self._second = None
+        self._in_second = 0
+        self._prev: Optional[List[str]] = None
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(maxsize)))
+        self._thread = None
+        if mode != "none":
+            self._thread = threading.Thread(target=self._run, name="console-sink", daemon=True)
+            self._thread.start()
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped_full + self._dropped_sink
+
+    def _selected(self, index: int) -> bool:
+        mode = self.mode
+        if mode == "all":
+            return True
+        if mode == "first":
+            return index == 1
+        if mode == "nth":
+            return index == self.n
+        if mode in ("every", "diff"):
+            return (index - 1) % self.n == 0
+        if mode == "persec":
+            second = int(time.monotonic())
+            if second != self._second:
+                self._second = second
+                self._in_second = 0
+            if self._in_second >= self.n:
+                return False
+            self._in_second += 1
+            return True
+        return False
+
+    def offer(self, index: int, payload: Payload) -> None:
+        if self._thread is None or not self._selected(index):
+            return
+        try:
+            self._queue.put_nowait((index, payload))
+        except queue.Full:
+            self._dropped_full += 1
+
+    def _render(self, index: int, payload: Payload) -> str:
+        if self.mode != "diff":
+            return describe(payload)
+        # Multiparte: diff solo de la cabecera JSON; los adjuntos, resumidos aparte
+        summary = None
+        if isinstance(payload, tuple):
+            payload, attachments = split_message(payload)
+            summary = attachment_summary(attachments)
+        text = describe(payload)
+        try:
+            pretty = json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+        except ValueError:
+            pretty = text
+        lines = pretty.splitlines()
+        prev, self._prev = self._prev, lines
+        if prev is None:
+            out = f"#{index}\n{pretty}"
+        else:
+            diff = difflib.unified_diff(prev, lines, "anterior", f"#{index}", n=0, lineterm="")
+            out = "\n".join(diff) or f"#{index} (sin cambios)"
+        return f"{out}\n{summary}" if summary else out
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Agrupar todo lo pendiente en una sola escritura
+            while len(batch) < 256:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            items = [item for item in batch if item is not _STOP]
+            if self._broken is not None:
+                self._dropped_sink += len(items)
+            else:
+                self._write(items)
+            if stop:
+                return
+
+    def _write(self, items) -> None:
+        lines = []
+        for item in items:
+            try:
+                lines.append(self._render(*item))
+            except Exception:
+                self._dropped_sink += 1
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception as e:
+            # Consola cerrada (`| head`), codificación no soportada...:
+            # desactivar la salida y seguir drenando sin escribir
+            self._broken = e
+            self._dropped_sink += len(lines)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+        if self._broken is not None:
+            print(f"[console] salida desactivada: {type(self._broken).__name__}: {self._broken}", file=sys.stderr)
+        if self.dropped:
+            print(f"[console] {self.dropped} mensajes sin imprimir", file=sys.stderr)
@@ -6,6 +6,9 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable, Dict, Optional
 
+from core.console import ConsoleSink
+from core.payload import Payload, log_record
+
 
 @dataclass
 class RecurrenceConfig:
@@ -16,51 +19,68 @@ class RecurrenceConfig:
 class CentralEngine:
     """Motor central: ejecuta un escenario a una frecuencia fija,
     con control de impresión y logging.
+
+    Los payloads son `bytes`/`memoryview` (o tuplas de partes, ver
+    `core.payload`) de extremo a extremo: no se re-codifican en ningún paso.
     """
 
     def __init__(
         self,
-        publish_fn: Callable[[str], None],
-        print_mode: str = "none",  # none|first|nth|all
+        publish_fn: Callable[[Payload], None],
+        print_mode: str = "none",  # none|first|nth|all|every|persec|diff
         print_n: int = 1,
         log_enabled: bool = False,
         log_file: Optional[str] = None,
+        flush_fn: Optional[Callable[[], None]] = None,
+        flush_interval: Optional[float] = None,
     ) -> None:
         self.publish_fn = publish_fn
+        self.flush_fn = flush_fn
+        # Máximo tiempo dormido sin llamar a flush_fn (keepalive del publicador)
+        self.flush_interval = flush_interval
         self.print_mode = print_mode
         self.print_n = max(1, int(print_n))
         self.log_enabled = log_enabled
         self.log_file = log_file
         self._log_handle = None
+        # Impresión en segundo plano: nunca bloquea el hilo de envío
+        self.console = ConsoleSink(mode=print_mode, n=self.print_n)
 
-    def _maybe_print(self, index: int, payload: str) -> None:
-        if self.print_mode == "none":
-            return
-        if self.print_mode == "all":
-            print(payload)
-            return
-        if self.print_mode == "first" and index == 1:
-            print(payload)
-            return
-        if self.print_mode == "nth" and index == self.print_n:
-            print(payload)
-            return
+    def _maybe_print(self, index: int, payload: Payload) -> None:
+        self.console.offer(index, payload)
+
+    def _flush(self) -> None:
+        # Se llama antes de dormir: lo publicado mientras el motor iba
+        # retrasado sale agrupado (p.ej. un solo writev en el backend raw)
+        if self.flush_fn is not None:
+            self.flush_fn()
+
+    def _idle(self, delay: float) -> None:
+        # Dormir hasta el próximo tick; si es largo, trocearlo para que
+        # flush_fn pueda mantener viva la conexión (PINGREQ)
+        self._flush()
+        step = self.flush_interval
+        while step and delay > step:
+            time.sleep(step)
+            delay -= step
+            self._flush()
+        time.sleep(max(0.0, delay))
 
-    def _maybe_log(self, payload: str) -> None:
+    def _maybe_log(self, payload: Payload) -> None:
         if not self.log_enabled:
             return
         if self._log_handle is None:
             path = Path(self.log_file or "app_logs.jsonl")
             path.parent.mkdir(parents=True, exist_ok=True)
-            self._log_handle = path.open("a", encoding="utf-8")
-        self._log_handle.write(payload + "\n")
+            self._log_handle = path.open("ab")
+        self._log_handle.writelines(log_record(payload))
         self._log_handle.flush()
 
     def run(
         self,
         rate_hz: float,
         recurrence: RecurrenceConfig,
-        next_payload: Callable[[], str],
+        next_payload: Callable[[], Payload],
     ) -> None:
         period = 1.0 / max(rate_hz, 0.001)
         next_t = time.time()
@@ -77,8 +97,9 @@ class CentralEngine:
                     self._maybe_log(payload)
                     now = time.time()
                     if now < next_t:
-                        time.sleep(max(0.0, next_t - now))
+                        self._idle(next_t - now)
                     next_t = max(now, next_t) + period
+                self._flush()
             else:  # infinite
                 while True:
                     i += 1
@@ -88,9 +109,10 @@ class CentralEngine:
                     self._maybe_log(payload)
                     now = time.time()
                     if now < next_t:
-                        time.sleep(max(0.0, next_t - now))
+                        self._idle(next_t - now)
                     next_t = max(now, next_t) + period
         finally:
+            self.console.close()
             if self._log_handle is not None:
                 self._log_handle.close()
 
@@ -5,6 +5,8 @@ from typing import Optional
 
 import paho.mqtt.client as mqtt
 
+from core.payload import Payload, to_bytes
+
 
 class MqttPublisher:
     def __init__(
@@ -17,6 +19,8 @@ class MqttPublisher:
     ) -> None:
         self.topic = topic
         self.qos = qos
+        # El hilo de paho gestiona el keepalive; el motor puede dormir sin límite
+        self.max_idle = None
         cid = client_id or f"scenario-pub-{os.getpid()}"
         self.client = mqtt.Client(client_id=cid, clean_session=True)
         self.client.loop_start()
@@ -26,10 +30,15 @@ class MqttPublisher:
                 break
             time.sleep(0.1)
 
-    def publish(self, payload: str) -> None:
-        info = self.client.publish(self.topic, payload, qos=self.qos)
+    def publish(self, payload: Payload) -> None:
+        # paho solo acepta bytes/bytearray: vistas y multipartes se unen una vez
+        info = self.client.publish(self.topic, to_bytes(payload), qos=self.qos)
         info.wait_for_publish()
 
+    def flush(self) -> None:
+        # paho envía desde su propio hilo; nada que agrupar aquí
+        pass
+
     def close(self) -> None:
         self.client.loop_stop()
         self.client.disconnect()
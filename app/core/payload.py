@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+import struct
+from typing import Sequence, Tuple, Union
+
+
+# Un payload es un único buffer o una tupla de partes (lista "gather") que se
+# concatenan al enviarse; así los adjuntos servidos desde assets mapeados en
+# memoria viajan como `memoryview` sin copias hasta el publicador.
+Buffer = Union[bytes, bytearray, memoryview]
+Payload = Union[Buffer, Tuple[Buffer, ...]]
+
+# Mensaje con adjuntos: u32 (big-endian) + cabecera JSON, y por cada adjunto
+# u32 + bytes. Un consumidor lo distingue de un JSON plano porque el primer
+# byte es 0x00, por eso la cabecera debe ocupar menos de 16 MiB.
+_LEN = struct.Struct(">I")
+MAX_HEAD_SIZE = 1 << 24
+
+
+def encode_message(head: bytes, attachments: Sequence[Buffer] = ()) -> Payload:
+    """Compone el payload: JSON plano si no hay adjuntos, multiparte si los hay."""
+    if not attachments:
+        return head
+    if len(head) >= MAX_HEAD_SIZE:
+        raise ValueError(f"Message head too large for attachment framing: {len(head)} bytes (max {MAX_HEAD_SIZE - 1})")
+    parts = [_LEN.pack(len(head)), head]
+    for att in attachments:
+        size = memoryview(att).nbytes
+        if size > 0xFFFFFFFF:
+            raise ValueError(f"Attachment too large: {size} bytes (max 4 GiB - 1)")
+        parts.append(_LEN.pack(size))
+        parts.append(att)
+    return tuple(parts)
+
+
+def iter_parts(payload: Payload) -> Tuple[Buffer, ...]:
+    if isinstance(payload, tuple):
+        return payload
+    return (payload,)
+
+
+def payload_size(payload: Payload) -> int:
+    return sum(memoryview(p).nbytes for p in iter_parts(payload))
+
+
+def to_bytes(payload: Payload) -> Union[bytes, bytearray]:
+    """Payload contiguo; solo copia si es una vista o tiene varias partes."""
+    if isinstance(payload, (bytes, bytearray)):
+        return payload
+    if isinstance(payload, memoryview):
+        return payload.tobytes()
+    return b"".join(payload)
+
+
+def split_message(payload: Tuple[Buffer, ...]) -> Tuple[Buffer, Tuple[Buffer, ...]]:
+    """(cabecera JSON, adjuntos) de un payload multiparte de `encode_message`."""
+    # (prefijo, cabecera, [prefijo, adjunto]*)
+    return payload[1], payload[3::2]
+
+
+def attachment_summary(attachments: Sequence[Buffer]) -> str:
+    sizes = ", ".join(str(memoryview(a).nbytes) for a in attachments)
+    return f"[+{len(attachments)} adjuntos: {sizes} bytes]"
+
+
+def describe(payload: Payload) -> str:
+    """Representación legible para consola: texto si es UTF-8, resumen si es binario."""
+    if isinstance(payload, tuple):
+        head, attachments = split_message(payload)
+        return f"{describe(head)} {attachment_summary(attachments)}"
+    try:
+        return str(payload, "utf-8")
+    except UnicodeDecodeError:
+        return f"<binario {memoryview(payload).nbytes} bytes>"
+
+
+def log_record(payload: Payload) -> Tuple[Buffer, ...]:
+    """Partes de una línea JSONL para el log.
+
+    Un payload de texto se registra tal cual; uno multiparte como
+    `{"message": <cabecera>, "attachment_sizes": [...]}` sin volcar los
+    adjuntos binarios, y uno binario que no es UTF-8 como `{"binary_size": N}`.
+    """
+    if isinstance(payload, tuple):
+        head, attachments = split_message(payload)
+        sizes = ",".join(str(memoryview(a).nbytes) for a in attachments)
+        return (b'{"message":', head, b',"attachment_sizes":[' + sizes.encode("ascii") + b"]}\n")
+    try:
+        str(payload, "utf-8")
+    except UnicodeDecodeError:
+        # Binario sin cabecera JSON: se registra solo su tamaño
+        return (b'{"binary_size":%d}\n' % memoryview(payload).nbytes,)
+    return (payload, b"\n")
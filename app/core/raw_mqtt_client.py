@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+import os
+import select
+import socket
+import struct
+import sys
+import time
+from typing import Dict, List, Optional
+
+from core.payload import Buffer, Payload, iter_parts, payload_size
+
+
+_U16 = struct.Struct(">H")
+
+_CONNACK = 0x20
+_PUBACK = 0x40
+
+_PINGREQ = b"\xc0\x00"
+_DISCONNECT = b"\xe0\x00"
+
+
+def _iov_max() -> int:
+    # Límite de buffers por sendmsg; sysconf puede faltar, fallar o devolver -1
+    try:
+        n = os.sysconf("SC_IOV_MAX")
+    except (AttributeError, ValueError, OSError):
+        return 1024
+    return n if n > 0 else 1024
+
+
+_IOV_MAX = _iov_max()
+# Windows no tiene sendmsg
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+
+
+def _varint(n: int) -> bytes:
+    # "Remaining length" de MQTT: 7 bits por byte, bit alto = continúa
+    out = bytearray()
+    while True:
+        byte = n % 128
+        n //= 128
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return _U16.pack(len(data)) + data
+
+
+class RawMqttPublisher:
+    """Publicador MQTT 3.1.1 mínimo sobre un socket, alternativo a `MqttPublisher`.
+
+    Implementa solo CONNECT, PUBLISH QoS 0/1 (con ventana de PUBACK pendientes)
+    y PINGREQ. `publish` no envía nada: encola la cabecera precomputada y las
+    partes del payload, y `flush` las escribe con un único `sendmsg` (writev).
+    El motor llama a `flush` en cada tick, antes de dormir, así que cuando va
+    retrasado varios PUBLISH salen en la misma llamada al sistema.
+    No reconecta: una caída del broker se propaga como `ConnectionError`.
+    `max_idle` indica al motor cada cuánto llamar a `flush` aunque no haya
+    mensajes, para que salga el PINGREQ antes de agotar el keepalive.
+    """
+
+    def __init__(
+        self,
+        broker: str,
+        port: int,
+        topic: str,
+        client_id: Optional[str] = None,
+        qos: int = 1,
+        keepalive: int = 60,
+        max_inflight: int = 1000,
+        max_pending: int = 512,
+    ) -> None:
+        if qos not in (0, 1):
+            raise ValueError("RawMqttPublisher only supports QoS 0 or 1")
+        self.topic = topic
+        self.qos = qos
+        self.keepalive = keepalive
+        # Con PINGREQ tras keepalive/2 sin enviar, el hueco máximo es 3/4 del keepalive
+        self.max_idle = keepalive / 4
+        self.max_inflight = max(1, int(max_inflight))
+        self.max_pending = max(1, int(max_pending))
+
+        # Partes fijas del PUBLISH para el topic configurado
+        self._first_byte = bytes([0x30 | (qos << 1)])
+        self._topic_block = _string(topic)
+        self._fixed_len = len(self._topic_block) + (2 if qos else 0)
+        self._header_cache: Dict[int, bytes] = {}
+
+        self._pending: List[Buffer] = []
+        self._pending_msgs = 0
+        self._inflight: Dict[int, None] = {}
+        self._next_pid = 0
+        self._rx = bytearray()
+        self._last_send = time.monotonic()
+
+        cid = client_id or f"scenario-pub-{os.getpid()}"
+        self.sock = socket.create_connection((broker, port), timeout=10)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._connect(cid)
+
+    def _connect(self, client_id: str) -> None:
+        # Protocolo "MQTT" nivel 4, clean session
+        body = _string("MQTT") + bytes([4, 0x02]) + _U16.pack(self.keepalive) + _string(client_id)
+        self._send([b"\x10" + _varint(len(body)) + body])
+        ptype, data = self._read_packet(blocking=True)
+        if ptype != _CONNACK or len(data) < 2:
+            raise ConnectionError("MQTT broker did not answer CONNECT with CONNACK")
+        if data[1] != 0:
+            raise ConnectionError(f"MQTT CONNECT refused (return code {data[1]})")
+
+    def _header(self, size: int) -> bytes:
+        header = self._header_cache.get(size)
+        if header is None:
+            if len(self._header_cache) >= 1024:
+                self._header_cache.clear()
+            header = self._first_byte + _varint(self._fixed_len + size) + self._topic_block
+            self._header_cache[size] = header
+        return header
+
+    def _allocate_pid(self) -> int:
+        while True:
+            self._next_pid = self._next_pid % 0xFFFF + 1
+            if self._next_pid not in self._inflight:
+                return self._next_pid
+
+    def publish(self, payload: Payload) -> None:
+        header = self._header(payload_size(payload))
+        if self.qos:
+            while len(self._inflight) >= self.max_inflight:
+                self.flush()
+                self._process_incoming(blocking=True)
+            pid = self._allocate_pid()
+            self._inflight[pid] = None
+            header += _U16.pack(pid)
+        self._pending.append(header)
+        self._pending.extend(iter_parts(payload))
+        self._pending_msgs += 1
+        if self._pending_msgs >= self.max_pending:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            pending, self._pending = self._pending, []
+            self._pending_msgs = 0
+            self._send(pending)
+        elif time.monotonic() - self._last_send >= self.keepalive / 2:
+            self._send([_PINGREQ])
+        self._process_incoming(blocking=False)
+
+    def _send(self, buffers: List[Buffer]) -> None:
+        if not _HAS_SENDMSG:
+            self.sock.sendall(b"".join(buffers))
+            self._last_send = time.monotonic()
+            return
+        views = [v for v in (memoryview(b).cast("B") for b in buffers) if v.nbytes]
+        start = 0
+        while start < len(views):
+            sent = self.sock.sendmsg(views[start:start + _IOV_MAX])
+            # Avanzar sobre lo enviado; un envío parcial deja la vista recortada
+            while sent:
+                n = views[start].nbytes
+                if sent >= n:
+                    sent -= n
+                    start += 1
+                else:
+                    views[start] = views[start][sent:]
+                    sent = 0
+        self._last_send = time.monotonic()
+
+    def _read_packet(self, blocking: bool):
+        """Devuelve (tipo, cuerpo) del siguiente paquete completo o (None, None)."""
+        while True:
+            packet = self._parse_packet()
+            if packet is not None:
+                return packet
+            if not blocking and not select.select([self.sock], [], [], 0)[0]:
+                return None, None
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("MQTT broker closed the connection")
+            self._rx += chunk
+
+    def _parse_packet(self):
+        rx = self._rx
+        length = 0
+        multiplier = 1
+        pos = 1
+        while True:
+            if pos >= len(rx):
+                return None
+            byte = rx[pos]
+            length += (byte & 0x7F) * multiplier
+            multiplier *= 128
+            pos += 1
+            if not byte & 0x80:
+                break
+        if len(rx) < pos + length:
+            return None
+        ptype = rx[0] & 0xF0
+        data = bytes(rx[pos:pos + length])
+        del rx[:pos + length]
+        return ptype, data
+
+    def _process_incoming(self, blocking: bool) -> None:
+        while True:
+            ptype, data = self._read_packet(blocking=blocking)
+            if ptype is None:
+                return
+            if ptype == _PUBACK:
+                self._inflight.pop(_U16.unpack_from(data)[0], None)
+                # Con un PUBACK basta para liberar hueco en la ventana
+                blocking = False
+            # PINGRESP y cualquier otro paquete no requieren acción
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Envía lo pendiente, espera PUBACKs hasta `timeout` y desconecta.
+
+        No lanza por un broker lento o caído: informa por stderr de los
+        mensajes QoS 1 sin confirmar y siempre intenta enviar DISCONNECT.
+        """
+        try:
+            deadline = time.monotonic() + timeout
+            self.flush()
+            while self._inflight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if select.select([self.sock], [], [], remaining)[0]:
+                    self._process_incoming(blocking=False)
+        except OSError as e:
+            print(f"[raw-mqtt] error al cerrar: {e}", file=sys.stderr)
+        finally:
+            if self._inflight:
+                print(f"[raw-mqtt] {len(self._inflight)} mensajes QoS 1 sin PUBACK al cerrar", file=sys.stderr)
+            try:
+                self._send([_DISCONNECT])
+            except OSError:
+                pass
+            self.sock.close()
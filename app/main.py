@@ -6,10 +6,14 @@ from typing import Callable
 from pathlib import Path
 from dotenv import load_dotenv
 
+from core.console import PRINT_MODES
 from core.engine import CentralEngine, RecurrenceConfig
 from core.mqtt_client import MqttPublisher
+from core.raw_mqtt_client import RawMqttPublisher
+from core.payload import Payload, encode_message
 from scenarios.scenario1 import Scenario1
 from scenarios.scenario2 import Scenario2
+from scenarios.scenario3 import Scenario3
 
 
 def select_scenario(name: str):
@@ -18,6 +22,8 @@ def select_scenario(name: str):
         return Scenario1
     if name == "scenario2":
         return Scenario2
+    if name == "scenario3":
+        return Scenario3
     raise ValueError(f"Escenario desconocido: {name}")
 
 
@@ -34,8 +40,9 @@ def main():
         port = int(os.environ["MQTT_PORT"])
         topic = os.environ["MQTT_TOPIC"]
         qos = int(os.environ["MQTT_QOS"])
+        backend = os.environ["MQTT_BACKEND"]  # paho|raw
 
-        print_mode = os.environ["PRINT_MODE"]  # none|first|nth|all
+        print_mode = os.environ["PRINT_MODE"]  # none|first|nth|all|every|persec|diff
         print_n = int(os.environ["PRINT_N"])
         log_enabled = os.environ["LOG_ENABLED"].lower() == "true"
         log_file = os.environ["LOG_FILE"]
@@ -44,14 +51,19 @@ def main():
         raise RuntimeError(f"Missing required environment variable: {missing}")
 
     # Validación básica
-    if print_mode not in ("none", "first", "nth", "all"):
-        raise RuntimeError("PRINT_MODE must be one of: none|first|nth|all")
+    if print_mode not in PRINT_MODES:
+        raise RuntimeError(f"PRINT_MODE must be one of: {'|'.join(PRINT_MODES)}")
+    if backend not in ("paho", "raw"):
+        raise RuntimeError("MQTT_BACKEND must be one of: paho|raw")
+    if backend == "raw" and qos not in (0, 1):
+        raise RuntimeError("MQTT_BACKEND=raw only supports MQTT_QOS 0 or 1")
 
     scenario = select_scenario(scenario_name)
 
-    publisher = MqttPublisher(broker=broker, port=port, topic=topic, qos=qos)
+    publisher_cls = RawMqttPublisher if backend == "raw" else MqttPublisher
+    publisher = publisher_cls(broker=broker, port=port, topic=topic, qos=qos)
 
-    def publish_fn(payload: str) -> None:
+    def publish_fn(payload: Payload) -> None:
         publisher.publish(payload)
 
     engine = CentralEngine(
@@ -60,22 +72,33 @@ def main():
         print_n=print_n,
         log_enabled=log_enabled,
         log_file=log_file,
+        flush_fn=publisher.flush,
+        flush_interval=publisher.max_idle,
     )
 
+    # Adjuntos binarios opcionales del escenario (p.ej. recortes JPEG por bbox)
+    attachments = getattr(scenario, "attachments", None)
+
     # construir función next_payload a partir del body + mapper del escenario
-    def next_payload() -> str:
+    def next_payload() -> Payload:
         body = scenario.base_body()
         mapped = scenario.mapper(body)
-        return json.dumps([mapped], ensure_ascii=False)
+        head = json.dumps([mapped], ensure_ascii=False).encode("utf-8")
+        if attachments is None:
+            return head
+        return encode_message(head, attachments(mapped))
 
     rec = scenario.recurrence
-    engine.run(
-        rate_hz=float(scenario.rate_hz),
-        recurrence=RecurrenceConfig(mode=rec["mode"], count=rec.get("count")),
-        next_payload=next_payload,
-    )
-
-    publisher.close()
+    try:
+        engine.run(
+            rate_hz=float(scenario.rate_hz),
+            recurrence=RecurrenceConfig(mode=rec["mode"], count=rec.get("count")),
+            next_payload=next_payload,
+        )
+    finally:
+        # También con Ctrl-C (modo infinite) o error: enviar lo pendiente,
+        # esperar PUBACKs y desconectar
+        publisher.close()
 
 
 if __name__ == "__main__":
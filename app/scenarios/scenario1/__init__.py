@@ -1,22 +1,12 @@
 #!/usr/bin/env python
-import json
 import random
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any
 
-
-ASSETS_DIR = Path(__file__).parent / "assets"
+from core.asset_store import AssetStore
 
 
-def _load_list(path: Path) -> List[Any]:
-    if not path.exists():
-        return []
-    data = json.loads(path.read_text(encoding="utf-8"))
-    if isinstance(data, list):
-        return data
-    if isinstance(data, dict) and isinstance(data.get("list"), list):
-        return data["list"]
-    return []
+ASSETS_DIR = Path(__file__).parent / "assets"
 
 
 class Scenario1:
@@ -24,10 +14,11 @@ class Scenario1:
     description = "Body simple para pruebas rápidas: {name,user_name,sent_messages}. name aleatorio, user_name secuencial, contador incrementa por mensaje."
     rate_hz = 10.0
     recurrence = {"mode": "fixed", "count": 20}
-    assets = {
-        "names": _load_list(ASSETS_DIR / "names.json"),
-        "user_names": _load_list(ASSETS_DIR / "user_names.json"),
-    }
+    # Assets indexados y mapeados en memoria; se abren en el primer acceso
+    assets = AssetStore(ASSETS_DIR, {
+        "names": "names.json",
+        "user_names": "user_names.json",
+    })
     _seq_index = 0
 
     @staticmethod
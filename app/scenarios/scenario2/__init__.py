@@ -1,23 +1,13 @@
 #!/usr/bin/env python
-import json
 import random
 import time
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any
 
 
 ASSETS_DIR = Path(__file__).parent / "assets"
 
 
-def _load_json(path: Path):
-    if not path.exists():
-        return None
-    try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return None
-
-
 class Scenario2:
     name = "scenario2"
     description = "Prueba real: 10× track_id=1/class=Fuego, 1× id=2/Humo, 1× id=3/Chispas; confidence y bbox aleatorios; 48 msg/s."
@@ -25,7 +15,6 @@ class Scenario2:
     rate_hz = 48.0
     # 10 (track_id=1) + 1 (id=2) + 1 (id=3) = 12 mensajes
     recurrence = {"mode": "fixed", "count": 12}
-    detected_object = _load_json(ASSETS_DIR / "detected_object.json")  # opcional
     _seq_index = 0
 
     @staticmethod
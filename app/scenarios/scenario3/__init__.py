@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+from pathlib import Path
+from typing import Dict, Any, List
+
+from core.asset_store import AssetStore
+from scenarios.scenario2 import Scenario2
+
+
+ASSETS_DIR = Path(__file__).parent / "assets"
+
+
+class Scenario3(Scenario2):
+    name = "scenario3"
+    description = "Como scenario2 (FrameDetections 10× Fuego, 1× Humo, 1× Chispas; 48 msg/s) con un recorte JPEG por bbox como adjunto binario (mensaje multiparte)."
+    # crops/: un recorte JPEG por clase, servido como memoryview del mapa
+    assets = AssetStore(ASSETS_DIR, {
+        "crops": "crops",
+    })
+    # Archivo de crops/ por class_name
+    _crop_file = {"Fuego": "fuego.jpg", "Humo": "humo.jpg", "Chispas": "chispas.jpg"}
+    _seq_index = 0
+
+    @classmethod
+    def mapper(cls, msg: Dict[str, Any]) -> Dict[str, Any]:
+        msg = super().mapper(msg)
+        # crop_index: posición del recorte del item entre los adjuntos (None si no hay)
+        names = cls.assets.names("crops")
+        pos = 0
+        for item in msg["items"]:
+            if cls._crop_file.get(item["class_name"]) in names:
+                item["crop_index"] = pos
+                pos += 1
+            else:
+                item["crop_index"] = None
+        return msg
+
+    @classmethod
+    def attachments(cls, msg: Dict[str, Any]) -> List[memoryview]:
+        crops = cls.assets["crops"]
+        names = cls.assets.names("crops")
+        return [
+            crops[names[cls._crop_file[item["class_name"]]]]
+            for item in msg["items"]
+            if item.get("crop_index") is not None
+        ]